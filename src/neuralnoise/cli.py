@@ -9,8 +9,10 @@ from pydub.exceptions import CouldntDecodeError
 from tabulate import tabulate
 
 from neuralnoise.extract import extract_content
+from neuralnoise.profiling import PipelineProfiler
 from neuralnoise.studio import create_podcast_episode
-from neuralnoise.utils import package_root
+from neuralnoise.studio.checkpoint import EpisodeCheckpoint
+from neuralnoise.utils import atomic_write_text, package_root
 
 app = typer.Typer()
 
@@ -32,6 +34,14 @@ def generate(
         help="Path to the podcast configuration file",
     ),
     only_script: bool = typer.Option(False, help="Only generate the script and exit"),
+    batch_segments: bool = typer.Option(
+        False,
+        help="Merge consecutive segments of the same speaker into a single TTS request",
+    ),
+    profile: bool = typer.Option(
+        False,
+        help="Profile each stage and save the results in the episode folder",
+    ),
 ):
     """
     Generate a script from one or more input text files using the specified configuration.
@@ -46,8 +56,9 @@ def generate(
     output_dir.mkdir(parents=True, exist_ok=True)
 
     content_path = output_dir / "content.txt"
+    checkpoint = EpisodeCheckpoint(output_dir)
 
-    if content_path.exists():
+    if checkpoint.is_complete("extract") and content_path.exists():
         with open(content_path, "r") as f:
             content = f.read()
     else:
@@ -59,10 +70,11 @@ def generate(
             raise typer.Exit(1)
 
         typer.secho(f"Extracting content from inputs {input}", fg=typer.colors.YELLOW)
-        content = extract_content(input)
+        with PipelineProfiler(output_dir, enabled=profile).stage("extract"):
+            content = extract_content(input)
 
-        with open(output_dir / "content.txt", "w") as f:
-            f.write(content)
+        atomic_write_text(content_path, content)
+        checkpoint.mark_complete("extract")
 
     typer.secho(f"Generating podcast episode {name}", fg=typer.colors.GREEN)
     create_podcast_episode(
@@ -70,6 +82,8 @@ def generate(
         content,
         config_path=config,
         only_script=only_script,
+        batch_segments=batch_segments,
+        profile=profile,
     )
 
     typer.secho(
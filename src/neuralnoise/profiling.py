@@ -0,0 +1,211 @@
+import json
+import logging
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from types import FrameType
+from typing import Iterator
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None  # type: ignore
+
+logger = logging.getLogger(__name__)
+
+# Frames anywhere in the stack in these packages mean the thread is waiting on
+# I/O, e.g. pydub's ffmpeg runs or HTTP requests made by the TTS clients
+IO_MODULES = {
+    "subprocess": "subprocess",
+    "socket": "network",
+    "ssl": "network",
+    "http.client": "network",
+    "urllib3": "network",
+    "httpcore": "network",
+    "httpx": "network",
+}
+
+# Leaf frames in these modules mean the thread is waiting for another thread
+LOCK_MODULES = {"threading", "concurrent.futures._base", "queue"}
+
+# Leaf frames of threads parked until there is work for them
+IDLE_FRAMES = {
+    ("concurrent.futures.thread", "_worker"),
+}
+
+# Sampler threads of every running profiler, which are never sampled
+_sampler_thread_ids: set[int] = set()
+
+
+def _children_cpu_time() -> float:
+    """CPU time used by finished child processes, such as ffmpeg runs."""
+    if resource is None:
+        return 0.0
+
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+def _io_category(module: str) -> str | None:
+    while module:
+        if module in IO_MODULES:
+            return IO_MODULES[module]
+        module = module.rpartition(".")[0]
+
+    return None
+
+
+def _thread_state(frame: FrameType) -> str:
+    leaf_module = frame.f_globals.get("__name__", "")
+
+    if (leaf_module, frame.f_code.co_name) in IDLE_FRAMES:
+        return "idle"
+
+    # Blocking calls are made from C code (e.g. `select` or `recv`), so the
+    # innermost I/O frame tells what the thread is waiting for
+    current: FrameType | None = frame
+    while current is not None:
+        if category := _io_category(current.f_globals.get("__name__", "")):
+            return category
+        current = current.f_back
+
+    if leaf_module in LOCK_MODULES:
+        return "lock"
+
+    return "other"
+
+
+def _frame_label(frame: FrameType) -> str:
+    module = frame.f_globals.get("__name__", "?")
+    return f"{frame.f_code.co_name} ({module})"
+
+
+class PipelineProfiler:
+    """Low-overhead sampling profiler for the stages of the generation pipeline.
+
+    While a stage runs, a background thread samples the stacks of every thread
+    at a fixed interval. When the stage ends, the samples are written to
+    `profile/<stage>.folded` in the collapsed stacks format understood by
+    flamegraph.pl or speedscope, along with `profile/<stage>.json` holding the
+    wall, CPU, subprocess CPU and wait times of the stage.
+
+    Samples are classified by thread state (`network`, `subprocess`, `lock`,
+    `idle` or `other`), both for all threads and for the thread running the
+    stage alone. Idle threads, such as pool workers waiting for work, are left
+    out of the collapsed stacks.
+    """
+
+    def __init__(
+        self,
+        output_dir: str | Path,
+        interval: float = 0.01,
+        enabled: bool = True,
+    ):
+        self.profile_dir = Path(output_dir) / "profile"
+        self.interval = interval
+        self.enabled = enabled
+
+    def _sample(
+        self,
+        samples: Counter[str],
+        states: Counter[str],
+        main_states: Counter[str],
+        main_thread_id: int,
+        stop: threading.Event,
+    ) -> None:
+        _sampler_thread_ids.add(threading.get_ident())
+
+        try:
+            while not stop.wait(self.interval):
+                thread_names = {t.ident: t.name for t in threading.enumerate()}
+
+                for thread_id, frame in sys._current_frames().items():
+                    if thread_id in _sampler_thread_ids:
+                        continue
+
+                    state = _thread_state(frame)
+                    states[state] += 1
+                    if thread_id == main_thread_id:
+                        main_states[state] += 1
+                    elif state == "idle":
+                        # Idle threads would only add noise to the flame graphs
+                        continue
+
+                    stack: list[str] = []
+                    current: FrameType | None = frame
+                    while current is not None:
+                        stack.append(_frame_label(current))
+                        current = current.f_back
+
+                    thread_name = thread_names.get(thread_id, str(thread_id))
+                    samples[";".join([thread_name, *reversed(stack)])] += 1
+        finally:
+            _sampler_thread_ids.discard(threading.get_ident())
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+
+        samples: Counter[str] = Counter()
+        states: Counter[str] = Counter()
+        main_states: Counter[str] = Counter()
+        stop = threading.Event()
+        sampler = threading.Thread(
+            target=self._sample,
+            args=(samples, states, main_states, threading.get_ident(), stop),
+            name="profiler",
+            daemon=True,
+        )
+
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        children_start = _children_cpu_time()
+        sampler.start()
+
+        try:
+            yield
+        finally:
+            stop.set()
+            sampler.join()
+
+            wall = time.perf_counter() - wall_start
+            cpu = time.process_time() - cpu_start
+            children_cpu = _children_cpu_time() - children_start
+
+            self._write(
+                name,
+                samples,
+                {
+                    "wall_seconds": wall,
+                    "cpu_seconds": cpu,
+                    "subprocess_cpu_seconds": children_cpu,
+                    "off_cpu_seconds": max(wall - cpu, 0.0),
+                    "samples": sum(samples.values()),
+                    "samples_by_state": dict(states),
+                    "main_thread_samples_by_state": dict(main_states),
+                },
+            )
+
+    def _write(self, name: str, samples: Counter[str], summary: dict) -> None:
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+
+        folded_path = self.profile_dir / f"{name}.folded"
+        folded_path.write_text(
+            "".join(f"{name};{stack} {count}\n" for stack, count in samples.items())
+        )
+        (self.profile_dir / f"{name}.json").write_text(json.dumps(summary, indent=2))
+
+        logger.info(
+            "⏱️  Stage %s took %.2fs (%.2fs CPU, %.2fs in subprocesses), "
+            "profile saved to %s",
+            name,
+            summary["wall_seconds"],
+            summary["cpu_seconds"],
+            summary["subprocess_cpu_seconds"],
+            folded_path,
+        )
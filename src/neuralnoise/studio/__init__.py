@@ -1,2 +1,3 @@
 from neuralnoise.studio.agents import PodcastStudio  # noqa
 from neuralnoise.studio.create import create_podcast_episode  # noqa
+from neuralnoise.studio.config import load_studio_config  # noqa
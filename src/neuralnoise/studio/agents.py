@@ -1,7 +1,4 @@
-import json
-import os
 from pathlib import Path
-from string import Template
 from typing import Any, Callable
 
 from autogen import (  # type: ignore
@@ -15,9 +12,11 @@ from autogen import (  # type: ignore
 from neuralnoise.studio.hooks import (
     optimize_chat_history_hook,
     save_last_json_message_hook,
+    store_script_section_hook,
 )
+from neuralnoise.studio.prompts import get_prompt_registry
+from neuralnoise.studio.sections import ScriptSectionStore
 from neuralnoise.types import StudioConfig
-from neuralnoise.utils import package_root
 
 
 def agent(func: Callable) -> Callable:
@@ -26,6 +25,19 @@ def agent(func: Callable) -> Callable:
     return func
 
 
+_agent_factory_names: dict[type, tuple[str, ...]] = {}
+
+
+def _agent_factories(cls: type) -> tuple[str, ...]:
+    """Names of the methods of `cls` decorated with `@agent`, in `dir` order."""
+    if cls not in _agent_factory_names:
+        _agent_factory_names[cls] = tuple(
+            attr for attr in dir(cls) if hasattr(getattr(cls, attr, None), "is_agent")
+        )
+
+    return _agent_factory_names[cls]
+
+
 class PodcastStudio:
     def __init__(self, work_dir: str | Path, config: StudioConfig, max_round: int = 50):
         self.work_dir = Path(work_dir)
@@ -33,34 +45,22 @@ class PodcastStudio:
         self.language = config.show.language
         self.max_round = max_round
 
-        self.llm_default_config = {
-            "model": "gpt-4o",
-            "api_key": os.environ["OPENAI_API_KEY"],
-        }
+        self.llm_default_config = config.llm.to_autogen_config()
 
         self.llm_json_mode_config = {
             "response_format": {"type": "json_object"},
-            "model": "gpt-4o",
-            "api_key": os.environ["OPENAI_API_KEY"],
+            **self.llm_default_config,
         }
 
-        self.agents: list[Agent] = []
-        for attr in dir(self):
-            if hasattr(getattr(self, attr), "is_agent"):
-                self.agents.append(getattr(self, attr)())
+        self.prompts = get_prompt_registry(config.prompts_dir)
+        self.sections = ScriptSectionStore()
 
-    def load_prompt(self, prompt_name: str, **kwargs: str) -> str:
-        root_folder = self.config.prompts_dir or package_root / "prompts"
-        prompt_path = root_folder / f"{prompt_name}.xml"
-
-        with open(prompt_path, "r") as f:
-            content = f.read()
+        self.agents: list[Agent] = [
+            getattr(self, attr)() for attr in _agent_factories(type(self))
+        ]
 
-        if kwargs:
-            template = Template(content)
-            content = template.safe_substitute(kwargs)
-
-        return content
+    def load_prompt(self, prompt_name: str, **kwargs: str) -> str:
+        return self.prompts.render(prompt_name, **kwargs)
 
     @agent
     def content_analyzer_agent(self) -> AssistantAgent:
@@ -102,9 +102,7 @@ class PodcastStudio:
         )
         agent.register_hook(
             hookable_method="process_message_before_send",
-            hook=save_last_json_message_hook(
-                "script_generator", self.work_dir / "scripts"
-            ),
+            hook=store_script_section_hook(self.sections),
         )
         agent.register_hook(
             hookable_method="process_all_messages_before_reply",
@@ -169,17 +167,9 @@ class PodcastStudio:
             ),
         )
 
-        # Extract the final script from the chat history
-        # TODO: improve this logic
-        script_sections: dict[str, Any] = {}
-        for script_filepath in sorted(self.work_dir.glob("scripts/*.json")):
-            with open(script_filepath) as f:
-                script = json.load(f)
-                script_sections[script["section_id"]] = script
-
-        # Combine all approved script sections
+        # Only the latest version of each section drafted in the chat is kept
         final_script = {
-            "sections": script_sections,
+            "sections": self.sections.latest(),
             "messages": groupchat.messages,
         }
 
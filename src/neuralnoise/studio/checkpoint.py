@@ -0,0 +1,79 @@
+import logging
+from datetime import datetime
+from pathlib import Path
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from neuralnoise.utils import atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+Stage = Literal["extract", "script", "tts", "export"]
+
+# Artifacts that episodes created before the state file existed can be resumed
+# from. They were written in a single call once the stage was finished.
+LEGACY_STAGE_ARTIFACTS: dict[Stage, str] = {
+    "extract": "content.txt",
+    "script": "script.json",
+}
+
+
+class StageState(BaseModel):
+    completed_at: datetime | None = None
+    units: list[str] = Field(default_factory=list)
+
+
+class EpisodeState(BaseModel):
+    stages: dict[Stage, StageState] = Field(default_factory=dict)
+
+
+class EpisodeCheckpoint:
+    """Tracks which stages of an episode generation pipeline are complete, and
+    which units of work (e.g. audio segments) within a stage are done, in a
+    per-episode `state.json` file.
+
+    The state file is rewritten atomically after every change, so a run that is
+    interrupted at any point can be resumed from the last completed unit.
+    """
+
+    def __init__(self, output_dir: str | Path):
+        self.output_dir = Path(output_dir)
+        self.path = self.output_dir / "state.json"
+
+        if self.path.exists():
+            self.state = EpisodeState.model_validate_json(self.path.read_text())
+        else:
+            self.state = EpisodeState()
+            self._infer_from_legacy_artifacts()
+
+    def _infer_from_legacy_artifacts(self) -> None:
+        # Audio segments aren't inferred: they were written in place and may be
+        # half-written, so they're checked when the audio is recorded instead
+        for stage, artifact in LEGACY_STAGE_ARTIFACTS.items():
+            if (self.output_dir / artifact).exists():
+                logger.info("♻️  Resuming stage %s from existing %s", stage, artifact)
+                self.state.stages[stage] = StageState(completed_at=datetime.now())
+
+    def _save(self) -> None:
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(self.path, self.state.model_dump_json(indent=2))
+
+    def is_complete(self, stage: Stage) -> bool:
+        stage_state = self.state.stages.get(stage)
+        return stage_state is not None and stage_state.completed_at is not None
+
+    def mark_complete(self, stage: Stage) -> None:
+        stage_state = self.state.stages.setdefault(stage, StageState())
+        stage_state.completed_at = datetime.now()
+        self._save()
+
+    def is_unit_complete(self, stage: Stage, unit: str) -> bool:
+        stage_state = self.state.stages.get(stage)
+        return stage_state is not None and unit in stage_state.units
+
+    def mark_unit_complete(self, stage: Stage, unit: str) -> None:
+        stage_state = self.state.stages.setdefault(stage, StageState())
+        if unit not in stage_state.units:
+            stage_state.units.append(unit)
+            self._save()
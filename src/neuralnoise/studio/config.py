@@ -0,0 +1,59 @@
+import hashlib
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from threading import Lock
+
+from neuralnoise.types import StudioConfig
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class _CachedConfig:
+    mtime_ns: int
+    size: int
+    digest: str
+    config: StudioConfig
+
+
+_configs: dict[Path, _CachedConfig] = {}
+_configs_lock = Lock()
+
+
+def load_studio_config(config_path: str | Path) -> StudioConfig:
+    """Loads, validates and pre-renders a studio configuration file once.
+
+    The returned configuration is immutable and shared by every caller. The
+    file is only parsed again when its contents change.
+    """
+    path = Path(config_path).resolve()
+    stat = os.stat(path)
+
+    with _configs_lock:
+        cached = _configs.get(path)
+
+        if (
+            cached is not None
+            and cached.mtime_ns == stat.st_mtime_ns
+            and cached.size == stat.st_size
+        ):
+            return cached.config
+
+        raw = path.read_bytes()
+        digest = hashlib.sha256(raw).hexdigest()
+
+        if cached is not None and cached.digest == digest:
+            config = cached.config
+        else:
+            logger.info("🔧  Loading configuration from %s", config_path)
+            config = StudioConfig.model_validate_json(raw)
+            config.render_show_details()
+            config.render_speakers_details()
+
+        _configs[path] = _CachedConfig(
+            mtime_ns=stat.st_mtime_ns, size=stat.st_size, digest=digest, config=config
+        )
+
+        return config
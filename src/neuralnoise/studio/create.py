@@ -1,60 +1,145 @@
 import hashlib
 import json
 import logging
+import os
 from pathlib import Path
 from typing import Any, Literal
 
 from pydub import AudioSegment
 from pydub.effects import normalize
+from pydub.exceptions import CouldntDecodeError
 from rich.progress import track
 
+from neuralnoise.profiling import PipelineProfiler
 from neuralnoise.studio import PodcastStudio
-from neuralnoise.tts import generate_audio_segment
+from neuralnoise.studio.checkpoint import EpisodeCheckpoint
+from neuralnoise.studio.config import load_studio_config
+from neuralnoise.studio.script import ScriptStore
+from neuralnoise.tts import generate_audio_batch, generate_audio_segment
 from neuralnoise.types import StudioConfig
 
 
 logger = logging.getLogger(__name__)
 
 
+def _clean_content(content: str) -> str:
+    return content.replace("¡", "").replace("¿", "")
+
+
+def _is_decodable(audio_path: Path) -> bool:
+    try:
+        return len(AudioSegment.from_mp3(str(audio_path))) > 0
+    except CouldntDecodeError:
+        return False
+
+
+def _batch_segments(
+    script_segments: list[tuple[str, dict[str, Any]]],
+    max_batch_chars: int,
+) -> list[list[tuple[str, dict[str, Any]]]]:
+    """Groups consecutive segments of the same speaker into batches of at most
+    `max_batch_chars` characters. Segments longer than the budget get a batch
+    of their own.
+    """
+    batches: list[list[tuple[str, dict[str, Any]]]] = []
+    batch_chars = 0
+
+    for section_id, segment in script_segments:
+        segment_chars = len(segment["content"])
+
+        if (
+            batches
+            and batches[-1][-1][1]["speaker"] == segment["speaker"]
+            and batch_chars + segment_chars <= max_batch_chars
+        ):
+            batches[-1].append((section_id, segment))
+            batch_chars += segment_chars
+        else:
+            batches.append([(section_id, segment)])
+            batch_chars = segment_chars
+
+    return batches
+
+
 def create_podcast_episode_from_script(
-    script: dict[str, Any],
+    script: dict[str, Any] | ScriptStore,
     config: StudioConfig,
     output_dir: Path,
+    batch_segments: bool = False,
+    max_batch_chars: int = 1000,
+    checkpoint: EpisodeCheckpoint | None = None,
 ) -> AudioSegment:
-    script_segments = []
-
     temp_dir = output_dir / "segments"
     temp_dir.mkdir(exist_ok=True)
 
-    sections_ids = list(sorted(script["sections"].keys()))
-    script_segments = [
-        (section_id, segment)
-        for section_id in sections_ids
-        for segment in script["sections"][section_id]["segments"]
-    ]
+    if isinstance(script, ScriptStore):
+        script_segments = list(script.iter_segments())
+    else:
+        sections_ids = list(sorted(script["sections"].keys()))
+        script_segments = [
+            (section_id, segment)
+            for section_id in sections_ids
+            for segment in script["sections"][section_id]["segments"]
+        ]
+
+    if batch_segments:
+        batches = _batch_segments(script_segments, max_batch_chars)
+    else:
+        batches = [[script_segment] for script_segment in script_segments]
 
     audio_segments = []
 
-    for section_id, segment in track(
-        script_segments,
+    for batch in track(
+        batches,
         description="Generating audio segments...",
-        total=len(script_segments),
+        total=len(batches),
     ):
-        speaker = config.speakers[segment["speaker"]]
-        content = segment["content"]
-
-        content = content.replace("¡", "").replace("¿", "")
-
-        content_hash = hashlib.md5(content.encode("utf-8")).hexdigest()
-        segment_path = temp_dir / f"{section_id}_{segment['id']}_{content_hash}.mp3"
-
-        audio_segment = generate_audio_segment(content, speaker, output_path=segment_path)
-
-        audio_segments.append(audio_segment)
-
-        if blank_duration := segment.get("blank_duration"):
-            silence = AudioSegment.silent(duration=blank_duration * 1000)
-            audio_segments.append(silence)
+        first_section_id, first_segment = batch[0]
+        speaker = config.speakers[first_segment["speaker"]]
+        contents = [_clean_content(segment["content"]) for _, segment in batch]
+
+        content_hash = hashlib.md5("\n\n".join(contents).encode("utf-8")).hexdigest()
+
+        if len(batch) == 1:
+            segment_path = temp_dir / (
+                f"{first_section_id}_{first_segment['id']}_{content_hash}.mp3"
+            )
+        else:
+            last_section_id, last_segment = batch[-1]
+            segment_path = temp_dir / (
+                f"{first_section_id}_{first_segment['id']}-"
+                f"{last_section_id}_{last_segment['id']}_{content_hash}.mp3"
+            )
+
+        # Segments are written atomically, but those of runs that predate the
+        # checkpoint were written in place, so they're only kept if they decode
+        overwrite = (
+            checkpoint is not None
+            and segment_path.exists()
+            and not checkpoint.is_unit_complete("tts", segment_path.name)
+            and not _is_decodable(segment_path)
+        )
+
+        if len(batch) == 1:
+            batch_audio = [
+                generate_audio_segment(
+                    contents[0], speaker, output_path=segment_path, overwrite=overwrite
+                )
+            ]
+        else:
+            batch_audio = generate_audio_batch(
+                contents, speaker, output_path=segment_path, overwrite=overwrite
+            )
+
+        if checkpoint is not None:
+            checkpoint.mark_unit_complete("tts", segment_path.name)
+
+        for (_, segment), audio_segment in zip(batch, batch_audio):
+            audio_segments.append(audio_segment)
+
+            if blank_duration := segment.get("blank_duration"):
+                silence = AudioSegment.silent(duration=blank_duration * 1000)
+                audio_segments.append(silence)
 
     podcast = AudioSegment.empty()
 
@@ -73,43 +158,73 @@ def create_podcast_episode(
     config_path: str | Path | None = None,
     format: Literal["wav", "mp3", "ogg"] = "wav",
     only_script: bool = False,
+    batch_segments: bool = False,
+    profile: bool = False,
 ):
     # Create output directory
     output_dir = Path("output") / name
     output_dir.mkdir(parents=True, exist_ok=True)
 
+    profiler = PipelineProfiler(output_dir, enabled=profile)
+
     # Load configuration
     if config_path:
-        logger.info("🔧  Loading configuration from %s", config_path)
-        with open(config_path, "r") as f:
-            config = StudioConfig.model_validate_json(f.read())
+        config = load_studio_config(config_path)
 
     if not config:
         raise ValueError("No studio configuration provided")
 
+    checkpoint = EpisodeCheckpoint(output_dir)
+
     # Generate the script
-    script_path = output_dir / "script.json"
+    script = ScriptStore(output_dir / "script")
+    legacy_script_path = output_dir / "script.json"
 
-    if script_path.exists():
+    if checkpoint.is_complete("script") and script.exists():
         logger.info("💬  Loading cached script")
-        script = json.loads(script_path.read_text())
+    elif checkpoint.is_complete("script") and legacy_script_path.exists():
+        logger.info("💬  Migrating cached script from %s", legacy_script_path)
+        script.write(json.loads(legacy_script_path.read_text()))
+        legacy_script_path.rename(legacy_script_path.with_suffix(".json.bak"))
+        checkpoint.mark_complete("script")
     else:
         logger.info("💬  Generating podcast script")
-        studio = PodcastStudio(work_dir=output_dir, config=config)
-        script = studio.generate_script(content)
-
-        script_path.write_text(json.dumps(script, ensure_ascii=False))
+        with profiler.stage("script"):
+            studio = PodcastStudio(work_dir=output_dir, config=config)
+            script.write(studio.generate_script(content))
+        checkpoint.mark_complete("script")
 
     if only_script:
         return
 
+    # Skip recording and exporting if this exact script was already exported
+    podcast_filepath = output_dir / f"output.{format}"
+    export_unit = (
+        f"{script.fingerprint()}_{format}{'_batched' if batch_segments else ''}"
+    )
+
+    if checkpoint.is_unit_complete("export", export_unit) and podcast_filepath.exists():
+        logger.info("✅  Podcast already exported to %s", podcast_filepath)
+        return
+
     # Generate audio segments and create the podcast
     logger.info("🎙️  Recording podcast episode")
-    podcast = create_podcast_episode_from_script(script, config, output_dir=output_dir)
+    with profiler.stage("tts"):
+        podcast = create_podcast_episode_from_script(
+            script,
+            config,
+            output_dir=output_dir,
+            batch_segments=batch_segments,
+            checkpoint=checkpoint,
+        )
 
     # Export podcast
-    podcast_filepath = output_dir / f"output.{format}"
     logger.info("️💾  Exporting podcast to %s", podcast_filepath)
-    podcast.export(podcast_filepath, format=format)
+    with profiler.stage("export"):
+        temp_filepath = output_dir / f".{podcast_filepath.name}.tmp"
+        podcast.export(temp_filepath, format=format)
+        os.replace(temp_filepath, podcast_filepath)
+
+    checkpoint.mark_unit_complete("export", export_unit)
 
     logger.info("✅  Podcast generation complete")
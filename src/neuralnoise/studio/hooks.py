@@ -8,6 +8,9 @@ from typing import Any, Callable
 
 from autogen.agentchat import Agent
 
+from neuralnoise.studio.sections import ScriptSectionStore
+from neuralnoise.utils import atomic_write_text
+
 logger = logging.getLogger(__name__)
 
 
@@ -20,7 +23,7 @@ def save_last_json_message_hook(filename: str, output_dir: str | Path):
 
         date_str = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
         filepath = Path(output_dir) / f"{filename}_{date_str}.json"
-        filepath.write_text(message)
+        atomic_write_text(filepath, message)
         logger.debug(f"Saved agent message to {filepath}")
 
         return message
@@ -28,6 +31,22 @@ def save_last_json_message_hook(filename: str, output_dir: str | Path):
     return hook
 
 
+def store_script_section_hook(store: ScriptSectionStore):
+    def hook(sender, message, recipient, silent):
+        message_dict = json.loads(message)
+        message = json.dumps(message_dict, indent=2, ensure_ascii=False)
+
+        if "section_id" in message_dict:
+            version = store.add(message_dict)
+            logger.debug(
+                f"Stored version {version} of section {message_dict['section_id']}"
+            )
+
+        return message
+
+    return hook
+
+
 Message = dict[str, Any]
 Messages = list[Message]
 
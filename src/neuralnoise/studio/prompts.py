@@ -0,0 +1,80 @@
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from string import Template
+from threading import Lock
+
+from neuralnoise.utils import package_root
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class CompiledPrompt:
+    mtime_ns: int
+    size: int
+    content: str
+    template: Template
+
+
+class PromptRegistry:
+    """Loads and compiles the prompt templates of a prompts directory once.
+
+    A prompt is only read from disk again when its file changes, so prompts
+    customized after `nn init` are picked up without restarting the process.
+    """
+
+    def __init__(self, prompts_dir: Path):
+        self.prompts_dir = prompts_dir
+        self._prompts: dict[str, CompiledPrompt] = {}
+        self._lock = Lock()
+
+    def get(self, prompt_name: str) -> CompiledPrompt:
+        prompt_path = self.prompts_dir / f"{prompt_name}.xml"
+        stat = os.stat(prompt_path)
+
+        with self._lock:
+            prompt = self._prompts.get(prompt_name)
+
+            if (
+                prompt is None
+                or prompt.mtime_ns != stat.st_mtime_ns
+                or prompt.size != stat.st_size
+            ):
+                logger.debug(f"Compiling prompt {prompt_path}")
+                with open(prompt_path, "r") as f:
+                    content = f.read()
+
+                prompt = CompiledPrompt(
+                    mtime_ns=stat.st_mtime_ns,
+                    size=stat.st_size,
+                    content=content,
+                    template=Template(content),
+                )
+                self._prompts[prompt_name] = prompt
+
+        return prompt
+
+    def render(self, prompt_name: str, **kwargs: str) -> str:
+        prompt = self.get(prompt_name)
+
+        if kwargs:
+            return prompt.template.safe_substitute(kwargs)
+
+        return prompt.content
+
+
+_registries: dict[Path, PromptRegistry] = {}
+_registries_lock = Lock()
+
+
+def get_prompt_registry(prompts_dir: Path | None = None) -> PromptRegistry:
+    """Returns the prompt registry shared by every studio using `prompts_dir`."""
+    root_folder = Path(prompts_dir or package_root / "prompts").resolve()
+
+    with _registries_lock:
+        if root_folder not in _registries:
+            _registries[root_folder] = PromptRegistry(root_folder)
+
+        return _registries[root_folder]
@@ -0,0 +1,79 @@
+import gzip
+import hashlib
+import json
+from pathlib import Path
+from typing import Any, Iterator
+
+from neuralnoise.utils import atomic_write_bytes, atomic_write_text
+
+
+class ScriptStore:
+    """On-disk storage of a podcast script, split so that rendering only reads
+    what it needs:
+
+    - `segments.jsonl`: one segment per line, tagged with its `section_id`.
+    - `index.json`: sections metadata, written last to mark the script complete.
+    - `messages.json.gz`: the compressed agents chat transcript, which is only
+      loaded on demand.
+    """
+
+    def __init__(self, script_dir: str | Path):
+        self.script_dir = Path(script_dir)
+        self.index_path = self.script_dir / "index.json"
+        self.segments_path = self.script_dir / "segments.jsonl"
+        self.messages_path = self.script_dir / "messages.json.gz"
+
+    def exists(self) -> bool:
+        return self.index_path.exists() and self.segments_path.exists()
+
+    def write(self, script: dict[str, Any]) -> None:
+        self.script_dir.mkdir(parents=True, exist_ok=True)
+
+        index: list[dict[str, Any]] = []
+        lines: list[str] = []
+
+        for key in sorted(script["sections"].keys()):
+            section = script["sections"][key]
+            section_id = section.get("section_id", key)
+            segments = section.get("segments", [])
+
+            index.append(
+                {
+                    **{k: v for k, v in section.items() if k != "segments"},
+                    "section_id": section_id,
+                }
+            )
+            lines.extend(
+                json.dumps({"section_id": section_id, **segment}, ensure_ascii=False)
+                for segment in segments
+            )
+
+        messages = json.dumps(script.get("messages", []), ensure_ascii=False)
+        atomic_write_bytes(self.messages_path, gzip.compress(messages.encode("utf-8")))
+        atomic_write_text(self.segments_path, "".join(f"{line}\n" for line in lines))
+        # The index is written last, so the script only exists once it's complete
+        atomic_write_text(self.index_path, json.dumps(index, ensure_ascii=False))
+
+    def iter_segments(self) -> Iterator[tuple[Any, dict[str, Any]]]:
+        """Yields `(section_id, segment)` pairs, streaming the segments file."""
+        with open(self.segments_path, "r") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+
+                segment = json.loads(line)
+                yield segment.pop("section_id"), segment
+
+    def load_messages(self) -> list[dict[str, Any]]:
+        if not self.messages_path.exists():
+            return []
+
+        return json.loads(gzip.decompress(self.messages_path.read_bytes()))
+
+    def fingerprint(self) -> str:
+        """Hash of the sections and segments, ignoring the chat transcript."""
+        content_hash = hashlib.md5()
+        content_hash.update(self.index_path.read_bytes())
+        content_hash.update(self.segments_path.read_bytes())
+
+        return content_hash.hexdigest()
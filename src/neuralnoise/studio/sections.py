@@ -0,0 +1,27 @@
+from typing import Any
+
+
+class ScriptSectionStore:
+    """In-memory store of the script sections drafted by the agents.
+
+    Every new draft of a section replaces the previous one and bumps its
+    version, so only the latest version of each section is kept around.
+    """
+
+    def __init__(self) -> None:
+        self._sections: dict[Any, dict[str, Any]] = {}
+        self._versions: dict[Any, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._sections)
+
+    def add(self, section: dict[str, Any]) -> int:
+        section_id = section["section_id"]
+
+        self._sections[section_id] = section
+        self._versions[section_id] = self._versions.get(section_id, 0) + 1
+
+        return self._versions[section_id]
+
+    def latest(self) -> dict[Any, dict[str, Any]]:
+        return dict(self._sections)
@@ -1,15 +1,26 @@
+import io
+import logging
 import os
 import time
+import wave
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from functools import cache
 from pathlib import Path
+from threading import Lock
 from typing import Iterator
 
 import backoff
-from elevenlabs import Voice, VoiceSettings, save
+from elevenlabs import Voice, VoiceSettings
 from elevenlabs.client import ElevenLabs
-from openai import APIError, OpenAI, RateLimitError
+from openai import APIConnectionError, APIError, OpenAI, RateLimitError
 from pydub import AudioSegment
+from pydub.silence import detect_silence
 
-from neuralnoise.types import Speaker
+from neuralnoise.types import Speaker, SpeakerSettings
+from neuralnoise.utils import atomic_write_bytes
+
+logger = logging.getLogger(__name__)
 
 
 def generate_audio_segment_elevenlabs(
@@ -39,7 +50,6 @@ def generate_audio_segment_elevenlabs(
     return audio
 
 
-@backoff.on_exception(backoff.expo, (RateLimitError, APIError), max_tries=5)
 def generate_audio_segment_openai(
     content: str,
     speaker: Speaker,
@@ -63,24 +73,354 @@ def generate_audio_segment_openai(
         time.sleep(0.5)
 
 
+@cache
+def _load_piper_voice(model_path: str):
+    try:
+        from piper import PiperVoice  # type: ignore
+    except ImportError as e:
+        raise ImportError(
+            "The piper TTS provider requires the piper-tts package. "
+            "Install it with `pip install neuralnoise[local]`."
+        ) from e
+
+    return PiperVoice.load(model_path)
+
+
+def generate_audio_segment_piper(
+    content: str,
+    speaker: Speaker,
+) -> bytes | Iterator[bytes]:
+    """Synthesizes speech locally on CPU with a Piper voice. The speaker's
+    `voice_id` is the path to the voice `.onnx` model.
+    """
+    voice = _load_piper_voice(speaker.settings.voice_id)
+
+    wav_buffer = io.BytesIO()
+    with wave.open(wav_buffer, "wb") as wav_file:
+        if hasattr(voice, "synthesize_wav"):
+            voice.synthesize_wav(content, wav_file)
+        else:
+            voice.synthesize(content, wav_file)
+
+    wav_buffer.seek(0)
+    mp3_buffer = io.BytesIO()
+    AudioSegment.from_wav(wav_buffer).export(mp3_buffer, format="mp3")
+
+    return mp3_buffer.getvalue()
+
+
 TTS_PROVIDERS = {
     "elevenlabs": generate_audio_segment_elevenlabs,
     "openai": generate_audio_segment_openai,
+    "piper": generate_audio_segment_piper,
 }
 
 
+def _is_throttled(error: Exception) -> bool:
+    return (
+        isinstance(error, RateLimitError) or getattr(error, "status_code", None) == 429
+    )
+
+
+def _is_retryable(error: Exception) -> bool:
+    """Only rate limits, server errors and connection errors are worth retrying,
+    retrying a bad request or an invalid API key would fail the same way.
+    """
+    if isinstance(error, APIConnectionError):
+        return True
+
+    status_code = getattr(error, "status_code", None)
+    return isinstance(status_code, int) and (status_code == 429 or status_code >= 500)
+
+
+@dataclass
+class ProviderStats:
+    """Exponentially weighted latency and error rate of a TTS provider."""
+
+    latency: float | None = None
+    error_rate: float = 0.0
+    updated_at: float = field(default_factory=time.monotonic)
+    throttled_until: float = 0.0
+    last_attempt: float | None = None
+
+    def is_throttled(self) -> bool:
+        return time.monotonic() < self.throttled_until
+
+    def current_error_rate(self, half_life: float) -> float:
+        """Error rate decayed by the time passed since it was last updated, so
+        old failures stop counting against the provider.
+        """
+        elapsed = time.monotonic() - self.updated_at
+        return self.error_rate * 0.5 ** (elapsed / half_life)
+
+
+class TTSRouter:
+    """Routes TTS requests across a speaker's equivalent voice configurations.
+
+    Configurations are tried by expected latency, derived from the live latency
+    and error rate of their providers, and by their configured order on ties.
+    Throttled providers are skipped for a cooldown period, a failed request
+    fails over to the next configuration, and a request taking much longer than
+    usual is hedged with a parallel request to the next configuration, keeping
+    whichever answers first. The speaker's main configuration is tried again
+    periodically, so a transient failure doesn't keep it away for good.
+    """
+
+    def __init__(
+        self,
+        smoothing: float = 0.2,
+        prior_latency: float = 5.0,
+        error_half_life: float = 60.0,
+        probe_interval: float = 60.0,
+        hedge_factor: float = 2.0,
+        min_hedge_delay: float = 2.0,
+        throttle_cooldown: float = 30.0,
+        max_workers: int = 4,
+    ):
+        self.smoothing = smoothing
+        self.prior_latency = prior_latency
+        self.error_half_life = error_half_life
+        self.probe_interval = probe_interval
+        self.hedge_factor = hedge_factor
+        self.min_hedge_delay = min_hedge_delay
+        self.throttle_cooldown = throttle_cooldown
+
+        self._stats: dict[str, ProviderStats] = {}
+        self._lock = Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="tts"
+        )
+
+    def stats(self, provider: str) -> ProviderStats:
+        with self._lock:
+            return self._stats.setdefault(provider, ProviderStats())
+
+    def expected_latency(self, provider: str) -> float:
+        stats = self.stats(provider)
+        latency = stats.latency if stats.latency is not None else self.prior_latency
+        error_rate = stats.current_error_rate(self.error_half_life)
+
+        return latency / max(1.0 - error_rate, 0.05)
+
+    def _record_success(self, provider: str, elapsed: float) -> None:
+        stats = self.stats(provider)
+        with self._lock:
+            stats.latency = (
+                elapsed
+                if stats.latency is None
+                else (1 - self.smoothing) * stats.latency + self.smoothing * elapsed
+            )
+            error_rate = stats.current_error_rate(self.error_half_life)
+            stats.error_rate = (1 - self.smoothing) * error_rate
+            stats.updated_at = time.monotonic()
+
+    def _record_failure(self, provider: str, error: Exception) -> None:
+        stats = self.stats(provider)
+        with self._lock:
+            error_rate = stats.current_error_rate(self.error_half_life)
+            stats.error_rate = error_rate + self.smoothing * (1.0 - error_rate)
+            stats.updated_at = time.monotonic()
+            if _is_throttled(error):
+                stats.throttled_until = time.monotonic() + self.throttle_cooldown
+
+    def candidates(self, speaker: Speaker) -> list[SpeakerSettings]:
+        """Voice configurations of the speaker in the order they should be tried."""
+        settings = [speaker.settings, *speaker.fallback_settings]
+
+        def key(index: int) -> tuple[bool, float, int]:
+            provider = settings[index].provider
+            return (
+                self.stats(provider).is_throttled(),
+                self.expected_latency(provider),
+                index,
+            )
+
+        order = sorted(range(len(settings)), key=key)
+
+        # Probe the main configuration again once it hasn't been tried for a while
+        primary_stats = self.stats(speaker.settings.provider)
+        last_attempt = primary_stats.last_attempt
+        is_stale = (
+            last_attempt is None
+            or time.monotonic() - last_attempt >= self.probe_interval
+        )
+        if order[0] != 0 and is_stale and not primary_stats.is_throttled():
+            order.remove(0)
+            order.insert(0, 0)
+
+        return [settings[index] for index in order]
+
+    def _hedge_delay(self, speaker_settings: SpeakerSettings) -> float:
+        latency = self.stats(speaker_settings.provider).latency
+        if latency is None:
+            latency = self.prior_latency
+
+        return max(self.min_hedge_delay, self.hedge_factor * latency)
+
+    def _synthesize(
+        self,
+        content: str,
+        speaker: Speaker,
+        speaker_settings: SpeakerSettings,
+    ) -> bytes:
+        provider = speaker_settings.provider
+        tts_function = TTS_PROVIDERS[provider]
+
+        stats = self.stats(provider)
+        start = time.monotonic()
+        with self._lock:
+            stats.last_attempt = start
+
+        try:
+            audio = tts_function(
+                content, speaker.model_copy(update={"settings": speaker_settings})
+            )
+            # Some providers stream the audio lazily, so consume it here
+            audio = audio if isinstance(audio, bytes) else b"".join(audio)
+        except Exception as e:
+            self._record_failure(provider, e)
+            raise
+
+        self._record_success(provider, time.monotonic() - start)
+        return audio
+
+    def generate(self, content: str, speaker: Speaker) -> bytes:
+        candidates = self.candidates(speaker)
+        pending: dict[Future, SpeakerSettings] = {}
+        errors: list[Exception] = []
+        launched = 0
+
+        def launch() -> SpeakerSettings:
+            nonlocal launched
+            speaker_settings = candidates[launched]
+            launched += 1
+
+            future = self._executor.submit(
+                self._synthesize, content, speaker, speaker_settings
+            )
+            pending[future] = speaker_settings
+            return speaker_settings
+
+        last_launched = launch()
+        while pending:
+            timeout = None
+            if launched < len(candidates):
+                timeout = self._hedge_delay(last_launched)
+
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                logger.info(f"TTS request to {last_launched.provider} is slow, hedging")
+                last_launched = launch()
+                continue
+
+            for future in done:
+                speaker_settings = pending.pop(future)
+                try:
+                    return future.result()
+                except Exception as e:
+                    logger.warning(
+                        f"TTS request to {speaker_settings.provider} failed: {e}"
+                    )
+                    errors.append(e)
+
+            # Fail over to the next configuration once every request failed
+            if not pending and launched < len(candidates):
+                last_launched = launch()
+
+        # Surface a retryable error if any, so the request can be retried later
+        raise next((e for e in errors if _is_retryable(e)), errors[-1])
+
+
+default_router = TTSRouter()
+
+
+@backoff.on_exception(
+    backoff.expo, Exception, max_tries=5, giveup=lambda e: not _is_retryable(e)
+)
+def _generate_with_retries(router: TTSRouter, content: str, speaker: Speaker) -> bytes:
+    return router.generate(content, speaker)
+
+
 def generate_audio_segment(
     content: str,
     speaker: Speaker,
     output_path: Path,
     overwrite: bool = False,
+    router: TTSRouter | None = None,
 ) -> AudioSegment:
     if not output_path.exists() or overwrite:
         print(f"Generating {output_path} with content: {content[:80]}...")
-        tts_function = TTS_PROVIDERS[speaker.settings.provider]
-        audio = tts_function(content, speaker)
+        audio = _generate_with_retries(router or default_router, content, speaker)
 
-        save(audio, str(output_path))
+        atomic_write_bytes(output_path, audio)
 
     audio_segment = AudioSegment.from_mp3(str(output_path))
     return audio_segment
+
+
+def split_audio_segment(
+    audio: AudioSegment,
+    weights: list[int],
+    min_silence_len: int = 250,
+    silence_thresh: float = -16.0,
+    tolerance: float = 0.25,
+) -> list[AudioSegment]:
+    """Splits an audio segment into `len(weights)` chunks.
+
+    Each cut is first placed where it would be if the audio duration was
+    distributed proportionally to `weights`, then snapped to the closest
+    detected silence within `tolerance` times the expected duration of the
+    shorter of the two chunks around it. Without such a silence, the
+    proportional position is used.
+    """
+    if len(weights) <= 1:
+        return [audio]
+
+    silences = detect_silence(
+        audio,
+        min_silence_len=min_silence_len,
+        silence_thresh=audio.dBFS + silence_thresh,
+    )
+    candidates = [(start + end) // 2 for start, end in silences]
+
+    total = sum(weights) or 1
+    durations = [len(audio) * weight / total for weight in weights]
+
+    cuts: list[int] = []
+    accumulated = 0
+    for index, weight in enumerate(weights[:-1]):
+        accumulated += weight
+        expected = len(audio) * accumulated // total
+        window = tolerance * min(durations[index], durations[index + 1])
+        previous = cuts[-1] if cuts else 0
+
+        available = [
+            c for c in candidates if c > previous and abs(c - expected) <= window
+        ]
+        cut = min(available, key=lambda c: abs(c - expected), default=expected)
+
+        cuts.append(max(cut, previous + 1))
+
+    bounds = [0, *cuts, len(audio)]
+    return [audio[start:end] for start, end in zip(bounds, bounds[1:])]
+
+
+def generate_audio_batch(
+    contents: list[str],
+    speaker: Speaker,
+    output_path: Path,
+    overwrite: bool = False,
+) -> list[AudioSegment]:
+    """Generates the audio of several consecutive segments of the same speaker
+    with a single TTS request and splits the result back into one audio segment
+    per content.
+    """
+    audio = generate_audio_segment(
+        "\n\n".join(contents),
+        speaker,
+        output_path=output_path,
+        overwrite=overwrite,
+    )
+
+    return split_audio_segment(audio, [len(content) for content in contents])
@@ -1,11 +1,22 @@
+import os
 from pathlib import Path
 from textwrap import dedent
-from typing import Literal
+from types import MappingProxyType
+from typing import Literal, Mapping
 
-from pydantic import BaseModel, Field
+from pydantic import (
+    BaseModel,
+    ConfigDict,
+    Field,
+    PrivateAttr,
+    field_serializer,
+    field_validator,
+)
 
 
 class VoiceSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     stability: float = Field(..., ge=0.0, le=1.0)
     similarity_boost: float = Field(..., ge=0.0, le=1.0)
     style: float = Field(default=0.0, ge=0.0, le=1.0)
@@ -13,39 +24,87 @@ class VoiceSettings(BaseModel):
 
 
 class SpeakerSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
     voice_id: str
 
-    provider: Literal["elevenlabs", "openai"] = "elevenlabs"
+    provider: Literal["elevenlabs", "openai", "piper"] = "elevenlabs"
     voice_model: Literal["eleven_multilingual_v2", "tts-1", "tts-1-hd"] = (
         "eleven_multilingual_v2"
     )
     voice_settings: VoiceSettings | None = None
 
 
+class LLMSettings(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    model: str = "gpt-4o"
+    base_url: str | None = None
+    api_key_env: str | None = "OPENAI_API_KEY"
+
+    def get_api_key(self) -> str:
+        # Local OpenAI-compatible servers don't check the key, but clients need one
+        if self.api_key_env is None:
+            return "not-needed"
+
+        return os.environ[self.api_key_env]
+
+    def to_autogen_config(self) -> dict[str, str]:
+        config = {"model": self.model, "api_key": self.get_api_key()}
+
+        if self.base_url is not None:
+            config["base_url"] = self.base_url
+
+        return config
+
+
 def _display_field(field: str):
     return " ".join([f.capitalize() for f in field.split("_")])
 
 
 class BaseModelDisplay(BaseModel):
+    """Immutable model whose rendered representations are computed only once."""
+
+    model_config = ConfigDict(frozen=True)
+
+    _rendered: dict[tuple, str] = PrivateAttr(default_factory=dict)
+
+    def __copy__(self):
+        # Copies may be created with updated fields, so they render on their own
+        copied = super().__copy__()
+        copied._rendered = {}
+        return copied
+
+    def __deepcopy__(self, memo=None):
+        # Fields are immutable all the way down, so they can be shared
+        return self.__copy__()
+
     def render(self, title: str, fields: list[str] | None = None):
         if fields is None:
             fields = list(self.__dict__.keys())
 
+        key = ("render", title, *fields)
+        if key in self._rendered:
+            return self._rendered[key]
+
         content = "\n".join(
             [f"\t{_display_field(f)}: {getattr(self, f)}" for f in fields]
         )
 
-        return dedent(f"""
+        self._rendered[key] = dedent(f"""
             {title}:
             {content}
         """)
 
+        return self._rendered[key]
+
 
 class Speaker(BaseModelDisplay):
     name: str
     about: str
 
     settings: SpeakerSettings
+    fallback_settings: tuple[SpeakerSettings, ...] = ()
 
 
 class Show(BaseModelDisplay):
@@ -59,14 +118,27 @@ class Show(BaseModelDisplay):
 
 class StudioConfig(BaseModelDisplay):
     show: Show
-    speakers: dict[str, Speaker]
+    speakers: Mapping[str, Speaker]
     prompts_dir: Path | None = None
+    llm: LLMSettings = Field(default_factory=LLMSettings)
+
+    @field_validator("speakers", mode="after")
+    @classmethod
+    def _freeze_speakers(cls, speakers: Mapping[str, Speaker]):
+        return MappingProxyType(dict(speakers))
+
+    @field_serializer("speakers")
+    def _serialize_speakers(self, speakers: Mapping[str, Speaker]):
+        return dict(speakers)
 
     def render_show_details(self) -> str:
         return self.show.render("Show")
 
     def render_speakers_details(self) -> str:
-        return "\n\n".join(
-            speaker.render(speaker_id, ["name", "about"])
-            for speaker_id, speaker in self.speakers.items()
-        )
+        if ("speakers",) not in self._rendered:
+            self._rendered[("speakers",)] = "\n\n".join(
+                speaker.render(speaker_id, ["name", "about"])
+                for speaker_id, speaker in self.speakers.items()
+            )
+
+        return self._rendered[("speakers",)]
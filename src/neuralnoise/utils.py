@@ -1,5 +1,47 @@
+import os
+from functools import cache
 from importlib.resources import files
 from pathlib import Path
-from typing import cast
+from tempfile import NamedTemporaryFile
+from typing import Iterable, cast
 
 package_root = cast(Path, files("neuralnoise").joinpath(""))
+
+
+@cache
+def _umask() -> int:
+    # The umask can only be read by setting it, so do it once and restore it
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+
+def atomic_write_bytes(path: str | Path, data: bytes | Iterable[bytes]) -> None:
+    """Writes `data` to `path` through a temporary file in the same directory so
+    readers never observe a partially written file.
+    """
+    path = Path(path)
+
+    with NamedTemporaryFile(
+        dir=path.parent, prefix=f".{path.name}.", suffix=".tmp", delete=False
+    ) as f:
+        try:
+            if isinstance(data, bytes):
+                f.write(data)
+            else:
+                for chunk in data:
+                    f.write(chunk)
+            f.flush()
+            os.fsync(f.fileno())
+            # Temporary files are private, give the file the usual permissions
+            os.chmod(f.name, 0o666 & ~_umask())
+        except BaseException:
+            f.close()
+            os.unlink(f.name)
+            raise
+
+    os.replace(f.name, path)
+
+
+def atomic_write_text(path: str | Path, content: str) -> None:
+    atomic_write_bytes(path, content.encode("utf-8"))
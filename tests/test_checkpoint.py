@@ -0,0 +1,39 @@
+from neuralnoise.studio.checkpoint import EpisodeCheckpoint
+
+
+def test_state_round_trips(tmp_path):
+    checkpoint = EpisodeCheckpoint(tmp_path)
+    checkpoint.mark_complete("script")
+    checkpoint.mark_unit_complete("tts", "1_1_abc.mp3")
+    checkpoint.mark_unit_complete("tts", "1_1_abc.mp3")
+
+    resumed = EpisodeCheckpoint(tmp_path)
+
+    assert resumed.is_complete("script")
+    assert not resumed.is_complete("extract")
+    assert resumed.is_unit_complete("tts", "1_1_abc.mp3")
+    assert not resumed.is_unit_complete("tts", "1_2_def.mp3")
+    assert resumed.state.stages["tts"].units == ["1_1_abc.mp3"]
+
+
+def test_stages_are_inferred_from_legacy_artifacts(tmp_path):
+    (tmp_path / "content.txt").write_text("Content")
+    (tmp_path / "script.json").write_text("{}")
+    (tmp_path / "segments").mkdir()
+    (tmp_path / "segments" / "1_1_abc.mp3").write_bytes(b"audio")
+
+    checkpoint = EpisodeCheckpoint(tmp_path)
+
+    assert checkpoint.is_complete("extract")
+    assert checkpoint.is_complete("script")
+    assert not checkpoint.is_unit_complete("tts", "1_1_abc.mp3")
+
+
+def test_state_file_takes_precedence_over_legacy_artifacts(tmp_path):
+    EpisodeCheckpoint(tmp_path).mark_complete("extract")
+    (tmp_path / "script.json").write_text("{}")
+
+    checkpoint = EpisodeCheckpoint(tmp_path)
+
+    assert checkpoint.is_complete("extract")
+    assert not checkpoint.is_complete("script")
@@ -0,0 +1,36 @@
+import json
+import os
+
+from neuralnoise.studio import load_studio_config
+
+CONFIG = {
+    "show": {"name": "Show", "about": "About", "language": "en"},
+    "speakers": {
+        "speaker1": {"name": "Zach", "about": "Host", "settings": {"voice_id": "z"}}
+    },
+}
+
+
+def _write_config(path, show_name: str) -> None:
+    path.write_text(
+        json.dumps({**CONFIG, "show": {**CONFIG["show"], "name": show_name}})
+    )
+
+
+def test_configs_are_shared_until_their_file_changes(tmp_path):
+    config_path = tmp_path / "config.json"
+    _write_config(config_path, "Show")
+
+    config = load_studio_config(config_path)
+    assert load_studio_config(tmp_path / "." / "config.json") is config
+
+    # Touched but unchanged files are only hashed
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert load_studio_config(config_path) is config
+
+    _write_config(config_path, "New show")
+    reloaded = load_studio_config(config_path)
+    assert reloaded is not config
+    assert "New show" in reloaded.render_show_details()
+    assert "New show" not in config.render_show_details()
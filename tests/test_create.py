@@ -0,0 +1,194 @@
+import hashlib
+import json
+
+import pytest
+from pydub import AudioSegment
+from pydub.exceptions import CouldntDecodeError
+
+from neuralnoise import tts
+from neuralnoise.studio import create
+from neuralnoise.studio.checkpoint import EpisodeCheckpoint
+from neuralnoise.studio.create import _batch_segments, create_podcast_episode
+from neuralnoise.types import StudioConfig
+
+CONFIG = StudioConfig.model_validate(
+    {
+        "show": {"name": "Show", "about": "About", "language": "en"},
+        "speakers": {
+            "speaker1": {"name": "Zach", "about": "Host", "settings": {"voice_id": "z"}}
+        },
+    }
+)
+
+SCRIPT = {
+    "sections": {
+        1: {
+            "section_id": 1,
+            "segments": [
+                {"id": 1, "speaker": "speaker1", "content": "Hello"},
+                {"id": 2, "speaker": "speaker1", "content": "Bye"},
+            ],
+        }
+    },
+    "messages": [],
+}
+
+
+def _segment(speaker: str, content: str) -> tuple[str, dict]:
+    return "1", {"speaker": speaker, "content": content}
+
+
+def test_batches_consecutive_segments_of_the_same_speaker():
+    segments = [
+        _segment("speaker1", "a" * 10),
+        _segment("speaker1", "b" * 10),
+        _segment("speaker2", "c" * 10),
+        _segment("speaker1", "d" * 10),
+    ]
+
+    batches = _batch_segments(segments, max_batch_chars=100)
+
+    assert batches == [segments[:2], segments[2:3], segments[3:]]
+
+
+def test_batches_respect_the_characters_budget():
+    segments = [_segment("speaker1", "a" * 40) for _ in range(5)]
+
+    batches = _batch_segments(segments, max_batch_chars=100)
+
+    assert [len(batch) for batch in batches] == [2, 2, 1]
+
+
+def test_segments_over_the_budget_get_their_own_batch():
+    segments = [
+        _segment("speaker1", "a" * 10),
+        _segment("speaker1", "b" * 200),
+        _segment("speaker1", "c" * 10),
+    ]
+
+    batches = _batch_segments(segments, max_batch_chars=100)
+
+    assert batches == [segments[:1], segments[1:2], segments[2:]]
+
+
+class FakeStudio:
+    scripts: list[str] = []
+
+    def __init__(self, work_dir, config):
+        pass
+
+    def generate_script(self, content):
+        self.scripts.append(content)
+        return SCRIPT
+
+
+class FakeTTSError(Exception):
+    status_code = 400
+
+
+@pytest.fixture
+def failures() -> set[str]:
+    """Contents that the fake TTS provider fails to record."""
+    return set()
+
+
+@pytest.fixture
+def recordings(tmp_path, monkeypatch, failures) -> list[str]:
+    """Runs episodes in `tmp_path` with a fake studio and TTS provider, and
+    returns the contents sent to the TTS provider.
+
+    Fake audio files hold their duration in milliseconds, and files that don't
+    can't be decoded.
+    """
+    recordings: list[str] = []
+
+    def generate(content, speaker):
+        if content in failures:
+            raise FakeTTSError(content)
+
+        recordings.append(content)
+        return b"audio:100"
+
+    def from_file(cls, file, format=None, **kwargs):
+        with open(file, "rb") as f:
+            data = f.read()
+        if not data.startswith(b"audio:"):
+            raise CouldntDecodeError(f"Can't decode {file}")
+
+        return AudioSegment.silent(duration=int(data.removeprefix(b"audio:")))
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(FakeStudio, "scripts", [])
+    monkeypatch.setattr(create, "PodcastStudio", FakeStudio)
+    monkeypatch.setitem(tts.TTS_PROVIDERS, "elevenlabs", generate)
+    monkeypatch.setattr(tts, "default_router", tts.TTSRouter())
+    monkeypatch.setattr(AudioSegment, "from_file", classmethod(from_file))
+
+    return recordings
+
+
+def _segment_name(content: str, segment_id: int) -> str:
+    return f"1_{segment_id}_{hashlib.md5(content.encode()).hexdigest()}.mp3"
+
+
+def test_exported_episodes_are_not_recorded_again(tmp_path, recordings):
+    create_podcast_episode("episode", "Content", config=CONFIG)
+
+    output_dir = tmp_path / "output" / "episode"
+    assert (output_dir / "output.wav").exists()
+    assert FakeStudio.scripts == ["Content"]
+    assert recordings == ["Hello", "Bye"]
+
+    create_podcast_episode("episode", "Content", config=CONFIG)
+    assert FakeStudio.scripts == ["Content"]
+    assert recordings == ["Hello", "Bye"]
+
+    # The recorded segments are reused when the export is missing
+    (output_dir / "output.wav").unlink()
+    create_podcast_episode("episode", "Content", config=CONFIG)
+    assert (output_dir / "output.wav").exists()
+    assert recordings == ["Hello", "Bye"]
+
+
+def test_recording_resumes_after_the_last_recorded_segment(
+    tmp_path, recordings, failures
+):
+    failures.add("Bye")
+
+    with pytest.raises(FakeTTSError):
+        create_podcast_episode("episode", "Content", config=CONFIG)
+
+    output_dir = tmp_path / "output" / "episode"
+    checkpoint = EpisodeCheckpoint(output_dir)
+    assert checkpoint.is_unit_complete("tts", _segment_name("Hello", 1))
+    assert not checkpoint.is_unit_complete("tts", _segment_name("Bye", 2))
+    assert not (output_dir / "output.wav").exists()
+
+    failures.clear()
+    create_podcast_episode("episode", "Content", config=CONFIG)
+
+    assert FakeStudio.scripts == ["Content"]
+    assert recordings == ["Hello", "Bye"]
+    assert (output_dir / "output.wav").exists()
+
+
+def test_legacy_episodes_are_migrated(tmp_path, recordings):
+    output_dir = tmp_path / "output" / "episode"
+    segments_dir = output_dir / "segments"
+    segments_dir.mkdir(parents=True)
+    (output_dir / "script.json").write_text(json.dumps(SCRIPT))
+    # A complete segment, and one that was being written when the run stopped
+    (segments_dir / _segment_name("Hello", 1)).write_bytes(b"audio:100")
+    (segments_dir / _segment_name("Bye", 2)).write_bytes(b"")
+
+    create_podcast_episode("episode", "Content", config=CONFIG)
+
+    assert FakeStudio.scripts == []
+    assert recordings == ["Bye"]
+    assert (output_dir / "script.json.bak").exists()
+    assert (output_dir / "script" / "index.json").exists()
+    assert (output_dir / "output.wav").exists()
+
+    checkpoint = EpisodeCheckpoint(output_dir)
+    assert checkpoint.is_unit_complete("tts", _segment_name("Hello", 1))
+    assert checkpoint.is_unit_complete("tts", _segment_name("Bye", 2))
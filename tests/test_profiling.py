@@ -0,0 +1,74 @@
+import json
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+
+from neuralnoise.profiling import PipelineProfiler
+
+
+def _read_profile(output_dir, name):
+    profile_dir = output_dir / "profile"
+    summary = json.loads((profile_dir / f"{name}.json").read_text())
+    return summary, (profile_dir / f"{name}.folded").read_text()
+
+
+def test_idle_threads_are_reported_apart_from_the_main_thread(tmp_path):
+    profiler = PipelineProfiler(tmp_path, interval=0.005)
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        # Start the workers, which then wait for more work
+        list(pool.map(abs, range(2)))
+
+        with profiler.stage("busy"):
+            deadline = time.monotonic() + 0.3
+            while time.monotonic() < deadline:
+                sum(range(1000))
+
+    summary, folded = _read_profile(tmp_path, "busy")
+
+    assert summary["samples_by_state"]["idle"] > 0
+    main_states = summary["main_thread_samples_by_state"]
+    assert main_states.get("other", 0) > sum(main_states.values()) / 2
+    assert "profiler;" not in folded
+    assert "_worker (concurrent.futures.thread)" not in folded
+
+
+def test_subprocess_and_network_waits_are_told_apart(tmp_path):
+    profiler = PipelineProfiler(tmp_path, interval=0.005)
+
+    with socket.create_server(("127.0.0.1", 0)) as server:
+        port = server.getsockname()[1]
+
+        def request():
+            # The server never answers, so the client blocks in `recv`
+            try:
+                httpx.get(f"http://127.0.0.1:{port}", timeout=5)
+            except httpx.HTTPError:
+                pass
+
+        client = threading.Thread(target=request, name="client")
+        client.start()
+        connection, _ = server.accept()
+
+        with profiler.stage("waits"):
+            subprocess.Popen(
+                [sys.executable, "-c", "import time; time.sleep(0.3)"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+            ).communicate()
+
+        connection.close()
+        client.join()
+
+    summary, folded = _read_profile(tmp_path, "waits")
+
+    main_states = summary["main_thread_samples_by_state"]
+    assert main_states.get("subprocess", 0) > sum(main_states.values()) / 2
+    assert "network" not in main_states
+    assert summary["samples_by_state"]["network"] > 0
+    assert "client;" in folded and "(httpcore." in folded
@@ -0,0 +1,38 @@
+import os
+
+from neuralnoise.studio.prompts import PromptRegistry, get_prompt_registry
+from neuralnoise.utils import package_root
+
+
+def test_prompts_are_compiled_again_when_their_file_changes(tmp_path):
+    prompt_path = tmp_path / "host.xml"
+    prompt_path.write_text("Hello $name")
+    registry = PromptRegistry(tmp_path)
+
+    prompt = registry.get("host")
+    assert registry.get("host") is prompt
+    assert registry.render("host", name="Zach") == "Hello Zach"
+
+    # Same size, different modification time
+    prompt_path.write_text("Hallo $name")
+    stat = prompt_path.stat()
+    os.utime(prompt_path, ns=(stat.st_atime_ns, prompt.mtime_ns + 1_000_000_000))
+    assert registry.render("host", name="Zach") == "Hallo Zach"
+
+    # Different size, same modification time
+    mtime_ns = prompt_path.stat().st_mtime_ns
+    prompt_path.write_text("Good morning $name")
+    os.utime(prompt_path, ns=(stat.st_atime_ns, mtime_ns))
+    assert registry.render("host", name="Zach") == "Good morning Zach"
+    assert registry.render("host") == "Good morning $name"
+
+
+def test_registries_are_shared_per_resolved_prompts_dir(tmp_path):
+    (tmp_path / "custom").mkdir()
+
+    registry = get_prompt_registry(tmp_path / "custom")
+
+    assert get_prompt_registry(tmp_path / "custom" / ".." / "custom") is registry
+    assert get_prompt_registry(tmp_path) is not registry
+    assert get_prompt_registry().prompts_dir == (package_root / "prompts").resolve()
+    assert get_prompt_registry() is get_prompt_registry(package_root / "prompts")
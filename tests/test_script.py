@@ -0,0 +1,37 @@
+from neuralnoise.studio.script import ScriptStore
+
+
+def test_segments_are_streamed_in_sections_order(tmp_path):
+    store = ScriptStore(tmp_path / "script")
+    store.write(
+        {
+            "sections": {
+                2: {"section_id": 2, "segments": [{"id": 1, "content": "Bye"}]},
+                1: {
+                    "section_id": 1,
+                    "segments": [
+                        {"id": 1, "content": "Hi"},
+                        {"id": 2, "content": "Hello"},
+                    ],
+                },
+            },
+            "messages": [{"content": "Draft"}],
+        }
+    )
+
+    assert store.exists()
+    assert list(store.iter_segments()) == [
+        (1, {"id": 1, "content": "Hi"}),
+        (1, {"id": 2, "content": "Hello"}),
+        (2, {"id": 1, "content": "Bye"}),
+    ]
+
+
+def test_messages_are_stored_compressed(tmp_path):
+    store = ScriptStore(tmp_path / "script")
+    assert store.load_messages() == []
+
+    store.write({"sections": {}, "messages": [{"name": "Host", "content": "Hi"}]})
+
+    assert store.load_messages() == [{"name": "Host", "content": "Hi"}]
+    assert store.messages_path.read_bytes()[:2] == b"\x1f\x8b"
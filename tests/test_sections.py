@@ -0,0 +1,39 @@
+import json
+
+from neuralnoise.studio.hooks import store_script_section_hook
+from neuralnoise.studio.sections import ScriptSectionStore
+
+
+def test_sections_are_versioned_and_the_latest_wins():
+    store = ScriptSectionStore()
+
+    assert store.add({"section_id": 1, "segments": ["draft"]}) == 1
+    assert store.add({"section_id": 2, "segments": ["draft"]}) == 1
+    assert store.add({"section_id": 1, "segments": ["final"]}) == 2
+
+    assert len(store) == 2
+    assert store.latest() == {
+        1: {"section_id": 1, "segments": ["final"]},
+        2: {"section_id": 2, "segments": ["draft"]},
+    }
+
+
+def test_latest_sections_are_a_copy():
+    store = ScriptSectionStore()
+    store.add({"section_id": 1})
+
+    store.latest().clear()
+
+    assert len(store) == 1
+
+
+def test_hook_only_stores_script_sections():
+    store = ScriptSectionStore()
+    hook = store_script_section_hook(store)
+
+    hook(None, json.dumps({"feedback": "Shorter intro"}), None, True)
+    assert len(store) == 0
+
+    message = hook(None, json.dumps({"section_id": 1, "segments": []}), None, True)
+    assert json.loads(message) == {"section_id": 1, "segments": []}
+    assert store.latest() == {1: {"section_id": 1, "segments": []}}
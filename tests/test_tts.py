@@ -0,0 +1,240 @@
+import io
+import shutil
+import sys
+import threading
+import time
+import wave
+
+import httpx
+import pytest
+from openai import APIConnectionError
+from pydub import AudioSegment
+from pydub.generators import Sine
+
+from neuralnoise import tts
+from neuralnoise.tts import (
+    TTS_PROVIDERS,
+    TTSRouter,
+    _is_retryable,
+    generate_audio_segment_piper,
+    split_audio_segment,
+)
+from neuralnoise.types import Speaker, SpeakerSettings
+
+
+class FakeAPIError(Exception):
+    def __init__(self, status_code: int):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+
+@pytest.fixture
+def speaker() -> Speaker:
+    return Speaker(
+        name="Zach",
+        about="Host",
+        settings=SpeakerSettings(provider="openai", voice_id="alloy"),
+        fallback_settings=[SpeakerSettings(provider="elevenlabs", voice_id="zach")],
+    )
+
+
+@pytest.fixture
+def calls(monkeypatch) -> list[str]:
+    """Records the providers called, and makes every provider return its name
+    unless a test replaces it.
+    """
+    calls: list[str] = []
+
+    def fake_provider(name):
+        def generate(content, speaker):
+            calls.append(name)
+            return name.encode()
+
+        return generate
+
+    for name in ["openai", "elevenlabs"]:
+        monkeypatch.setitem(TTS_PROVIDERS, name, fake_provider(name))
+
+    return calls
+
+
+def test_fails_over_to_the_next_configuration(monkeypatch, speaker, calls):
+    def failing(content, speaker):
+        calls.append("openai")
+        raise FakeAPIError(500)
+
+    monkeypatch.setitem(TTS_PROVIDERS, "openai", failing)
+    router = TTSRouter()
+
+    assert router.generate("Hello", speaker) == b"elevenlabs"
+    assert calls == ["openai", "elevenlabs"]
+    assert router.stats("openai").error_rate > 0
+
+
+def test_hedges_slow_requests(monkeypatch, speaker, calls):
+    release = threading.Event()
+
+    def slow(content, speaker):
+        calls.append("openai")
+        release.wait(5)
+        return b"openai"
+
+    monkeypatch.setitem(TTS_PROVIDERS, "openai", slow)
+    router = TTSRouter(prior_latency=0.01, min_hedge_delay=0.05)
+
+    try:
+        start = time.monotonic()
+        assert router.generate("Hello", speaker) == b"elevenlabs"
+        assert time.monotonic() - start < 1
+        assert calls == ["openai", "elevenlabs"]
+    finally:
+        release.set()
+
+
+def test_throttled_providers_are_skipped_until_the_cooldown_ends(
+    monkeypatch, speaker, calls
+):
+    def throttled(content, speaker):
+        calls.append("openai")
+        raise FakeAPIError(429)
+
+    monkeypatch.setitem(TTS_PROVIDERS, "openai", throttled)
+    router = TTSRouter(throttle_cooldown=0.1, probe_interval=0.1)
+
+    assert router.generate("Hello", speaker) == b"elevenlabs"
+    assert router.stats("openai").is_throttled()
+    assert [s.provider for s in router.candidates(speaker)] == ["elevenlabs", "openai"]
+
+    assert router.generate("Hello", speaker) == b"elevenlabs"
+    assert calls == ["openai", "elevenlabs", "elevenlabs"]
+
+    time.sleep(0.15)
+    assert [s.provider for s in router.candidates(speaker)] == ["openai", "elevenlabs"]
+
+
+def test_primary_is_probed_again_after_a_transient_failure(monkeypatch, speaker, calls):
+    failures = iter([FakeAPIError(503)])
+
+    def flaky(content, speaker):
+        calls.append("openai")
+        if error := next(failures, None):
+            raise error
+        return b"openai"
+
+    monkeypatch.setitem(TTS_PROVIDERS, "openai", flaky)
+    router = TTSRouter(probe_interval=0.05)
+
+    assert router.generate("Hello", speaker) == b"elevenlabs"
+    assert router.candidates(speaker)[0].provider == "elevenlabs"
+
+    time.sleep(0.1)
+    assert router.generate("Hello", speaker) == b"openai"
+
+
+def test_unmeasured_configurations_keep_their_configured_order(speaker):
+    router = TTSRouter()
+
+    assert [s.provider for s in router.candidates(speaker)] == ["openai", "elevenlabs"]
+
+
+def test_raises_when_every_configuration_fails(monkeypatch, speaker, calls):
+    def unauthorized(content, speaker):
+        calls.append(speaker.settings.provider)
+        raise FakeAPIError(401)
+
+    def unavailable(content, speaker):
+        calls.append(speaker.settings.provider)
+        raise FakeAPIError(503)
+
+    monkeypatch.setitem(TTS_PROVIDERS, "openai", unavailable)
+    monkeypatch.setitem(TTS_PROVIDERS, "elevenlabs", unauthorized)
+    router = TTSRouter()
+
+    with pytest.raises(FakeAPIError) as error:
+        router.generate("Hello", speaker)
+
+    assert calls == ["openai", "elevenlabs"]
+    # The retryable error is raised so that the request can be retried later
+    assert error.value.status_code == 503
+
+
+@pytest.mark.parametrize(
+    "status_code, retryable",
+    [(400, False), (401, False), (404, False), (429, True), (500, True), (503, True)],
+)
+def test_only_rate_limits_and_server_errors_are_retried(status_code, retryable):
+    assert _is_retryable(FakeAPIError(status_code)) is retryable
+
+
+def test_connection_errors_are_retried():
+    request = httpx.Request("POST", "https://api.openai.com/v1/audio/speech")
+
+    assert _is_retryable(APIConnectionError(request=request))
+    assert not _is_retryable(ValueError("Unknown voice"))
+
+
+def _speech(*durations: int) -> AudioSegment:
+    """Tone chunks of the given durations separated by 300ms silences."""
+    audio = AudioSegment.empty()
+    for index, duration in enumerate(durations):
+        if index:
+            audio += AudioSegment.silent(duration=300)
+        audio += Sine(440).to_audio_segment(duration=duration)
+
+    return audio
+
+
+def test_split_snaps_to_silences_near_the_expected_cut():
+    chunks = split_audio_segment(_speech(900, 1100), [1, 1])
+
+    # The silence spans 900-1200ms, the proportional cut is at 1150ms
+    assert [len(chunk) for chunk in chunks] == [1050, 1250]
+
+
+def test_split_ignores_silences_far_from_the_expected_cut():
+    chunks = split_audio_segment(_speech(200, 1800), [1, 1])
+
+    assert [len(chunk) for chunk in chunks] == [1150, 1150]
+
+
+def test_split_returns_one_chunk_per_weight():
+    audio = _speech(500, 500, 500)
+    chunks = split_audio_segment(audio, [1, 1, 1, 1])
+
+    assert len(chunks) == 4
+    assert sum(len(chunk) for chunk in chunks) == len(audio)
+    assert split_audio_segment(audio, [1]) == [audio]
+
+
+class FakePiperVoice:
+    def synthesize_wav(self, text: str, wav_file: wave.Wave_write) -> None:
+        wav_file.setnchannels(1)
+        wav_file.setsampwidth(2)
+        wav_file.setframerate(22050)
+        wav_file.writeframes(b"\x00\x00" * 22050)
+
+
+@pytest.fixture
+def piper_speaker() -> Speaker:
+    return Speaker(
+        name="Zach",
+        about="Host",
+        settings=SpeakerSettings(provider="piper", voice_id="en_US-lessac.onnx"),
+    )
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="requires ffmpeg")
+def test_piper_voices_are_converted_to_mp3(monkeypatch, piper_speaker):
+    monkeypatch.setattr(tts, "_load_piper_voice", lambda path: FakePiperVoice())
+
+    audio = generate_audio_segment_piper("Hello", piper_speaker)
+
+    assert 950 <= len(AudioSegment.from_file(io.BytesIO(audio), format="mp3")) <= 1100
+
+
+def test_piper_requires_the_local_extra(monkeypatch, piper_speaker):
+    monkeypatch.setitem(sys.modules, "piper", None)
+    tts._load_piper_voice.cache_clear()
+
+    with pytest.raises(ImportError, match="neuralnoise\\[local\\]"):
+        generate_audio_segment_piper("Hello", piper_speaker)
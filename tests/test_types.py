@@ -0,0 +1,80 @@
+import copy
+
+import pytest
+
+from neuralnoise.types import LLMSettings, Speaker, SpeakerSettings, StudioConfig
+
+CONFIG = {
+    "show": {"name": "Show", "about": "About", "language": "en"},
+    "speakers": {
+        "speaker1": {
+            "name": "Zach",
+            "about": "Host",
+            "settings": {"voice_id": "zach"},
+            "fallback_settings": [{"provider": "openai", "voice_id": "alloy"}],
+        }
+    },
+}
+
+
+def test_configs_are_immutable():
+    config = StudioConfig.model_validate(CONFIG)
+
+    with pytest.raises(TypeError):
+        config.speakers["speaker2"] = config.speakers["speaker1"]
+    assert isinstance(config.speakers["speaker1"].fallback_settings, tuple)
+    assert StudioConfig.model_validate_json(config.model_dump_json()) == config
+
+
+def test_copies_are_rendered_again():
+    config = StudioConfig.model_validate(CONFIG)
+    speaker = config.speakers["speaker1"]
+    config.render_speakers_details()
+
+    renamed = speaker.model_copy(update={"name": "Sara"})
+    assert "Sara" in renamed.render("speaker1", ["name"])
+    assert "Zach" in speaker.render("speaker1", ["name"])
+
+    updated = config.model_copy(update={"speakers": {"speaker1": renamed}}, deep=True)
+    assert "Sara" in updated.render_speakers_details()
+    assert copy.deepcopy(config).render_speakers_details() == (
+        config.render_speakers_details()
+    )
+
+
+def test_speakers_accept_any_fallback_sequence():
+    speaker = Speaker(
+        name="Zach",
+        about="Host",
+        settings=SpeakerSettings(voice_id="zach"),
+        fallback_settings=[SpeakerSettings(provider="openai", voice_id="alloy")],
+    )
+
+    assert speaker.fallback_settings == (
+        SpeakerSettings(provider="openai", voice_id="alloy"),
+    )
+
+
+def test_llm_settings_default_to_openai(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "sk-test")
+
+    assert LLMSettings().to_autogen_config() == {
+        "model": "gpt-4o",
+        "api_key": "sk-test",
+    }
+
+
+def test_llm_settings_for_local_servers(monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "gsk-test")
+
+    local = LLMSettings(
+        model="llama3.1", base_url="http://localhost:11434/v1", api_key_env=None
+    )
+    assert local.to_autogen_config() == {
+        "model": "llama3.1",
+        "api_key": "not-needed",
+        "base_url": "http://localhost:11434/v1",
+    }
+
+    custom = LLMSettings(model="llama3", api_key_env="GROQ_API_KEY")
+    assert custom.to_autogen_config()["api_key"] == "gsk-test"
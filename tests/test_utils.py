@@ -0,0 +1,33 @@
+import os
+
+import pytest
+
+from neuralnoise.utils import atomic_write_bytes, atomic_write_text
+
+
+def test_atomic_writes_replace_the_file_with_regular_permissions(tmp_path):
+    path = tmp_path / "state.json"
+    path.write_text("old")
+
+    atomic_write_text(path, "new")
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert path.read_text() == "new"
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+    assert os.listdir(tmp_path) == ["state.json"]
+
+
+def test_failed_atomic_writes_keep_the_previous_file(tmp_path):
+    path = tmp_path / "segment.mp3"
+    path.write_bytes(b"old")
+
+    def chunks():
+        yield b"new"
+        raise ConnectionError("Stream interrupted")
+
+    with pytest.raises(ConnectionError):
+        atomic_write_bytes(path, chunks())
+
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["segment.mp3"]